@@ -3,12 +3,17 @@ Web Scraper Pro - Smart Auto-Detection
 Users don't need to know CSS selectors!
 """
 
+import http.cookiejar
+import io
 import streamlit as st
 import pandas as pd
 from scraper import WebScraper
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from collections import Counter
+import soupsieve
+from collections import Counter, defaultdict
+from itertools import islice
 
 # Page configuration
 st.set_page_config(
@@ -17,58 +22,121 @@ st.set_page_config(
     layout="wide"
 )
 
+# Shared HTTP session so repeat requests reuse open connections
+@st.cache_resource
+def get_session():
+    """Create a pooled HTTP session that survives Streamlit reruns."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers['User-Agent'] = 'Mozilla/5.0 (Educational Web Scraper)'
+    # Every visitor shares this session, so never keep cookies between requests
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+# Downloaded pages are cached so Streamlit reruns don't hit the site again
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_html(url):
+    """Fetch the raw HTML of a webpage."""
+    response = get_session().get(url, timeout=15)
+    response.raise_for_status()
+    return response.content
+
+# Common container patterns as (selector, tag, class) - None matches anything
+COMMON_PATTERNS = (
+    ('article', 'article', None), ('div.item', 'div', 'item'),
+    ('div.card', 'div', 'card'), ('div.product', 'div', 'product'),
+    ('div.post', 'div', 'post'), ('li', 'li', None),
+    ('.listing', None, 'listing'), ('.entry', None, 'entry'),
+)
+
+def _matching_patterns(elem, patterns):
+    """Yield the selectors of the common patterns an element matches."""
+    classes = elem.get('class') or ()
+    for selector, tag, cls in patterns:
+        if (tag is None or elem.name == tag) and (cls is None or cls in classes):
+            yield selector
+
+# Only successful detections are cached; failures raise, so the next click retries
+@st.cache_data(ttl=300, show_spinner=False)
+def _detect_containers(url):
+    """Find repeating containers on a webpage, raising if it can't be fetched."""
+    html = _fetch_html(url)
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # Index elements by class in one walk, then count class occurrences
+    by_class = defaultdict(list)
+    for elem in soup.find_all(class_=True):
+        for cls in elem.get('class') or ():
+            by_class[cls].append(elem)
+    class_counter = Counter({cls: len(elems) for cls, elems in by_class.items()})
+    
+    # Find classes that appear multiple times (likely containers)
+    candidates = []
+    for cls, count in class_counter.most_common(20):
+        # Needs at least 3 occurrences; counts only go down from here,
+        # and we never return more than 5 candidates
+        if count < 3 or len(candidates) >= 5:
+            break
+        
+        # Escape classes like "md:flex" or "w-1/2" so the selector stays valid
+        selector = f".{soupsieve.escape(cls)}"
+        elements = by_class[cls]
+        
+        # Check if elements have children (likely containers)
+        if elements and len(elements[0].find_all()) > 2:
+            candidates.append({
+                'selector': selector,
+                'count': count,
+                'element': elements[0]
+            })
+    
+    # Also check for common container patterns, skipping any whose
+    # class never appears on the page
+    patterns = [p for p in COMMON_PATTERNS if p[2] is None or p[2] in class_counter]
+    
+    # Match every pattern in a single walk of the page
+    pattern_counts = Counter()
+    first_match = {}
+    if patterns:
+        for elem in soup.select(', '.join(p[0] for p in patterns)):
+            for pattern in _matching_patterns(elem, patterns):
+                pattern_counts[pattern] += 1
+                first_match.setdefault(pattern, elem)
+    
+    for pattern, _, _ in patterns:
+        if pattern_counts[pattern] >= 3:
+            candidates.insert(0, {
+                'selector': pattern,
+                'count': pattern_counts[pattern],
+                'element': first_match[pattern]
+            })
+    
+    # Render HTML previews only for the top 5 we actually return
+    top_candidates = candidates[:5]
+    for candidate in top_candidates:
+        candidate['sample'] = str(candidate.pop('element'))[:200]
+    
+    return top_candidates, html
+
 # Helper function to auto-detect containers
 def auto_detect_containers(url):
-    """Automatically detect repeating containers on a webpage."""
+    """Automatically detect repeating containers on a webpage.
+    
+    Returns the candidates along with the page HTML, so later steps can reuse it.
+    """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find all elements with classes
-        elements_with_classes = soup.find_all(class_=True)
-        
-        # Count class occurrences
-        class_counter = Counter()
-        for elem in elements_with_classes:
-            classes = elem.get('class', [])
-            for cls in classes:
-                class_counter[cls] += 1
-        
-        # Find classes that appear multiple times (likely containers)
-        candidates = []
-        for cls, count in class_counter.most_common(20):
-            if count >= 3:  # Appears at least 3 times
-                selector = f".{cls}"
-                elements = soup.select(selector)
-                
-                # Check if elements have children (likely containers)
-                if elements and len(elements[0].find_all()) > 2:
-                    candidates.append({
-                        'selector': selector,
-                        'count': count,
-                        'sample': str(elements[0])[:200]
-                    })
-        
-        # Also check for common container patterns
-        common_patterns = [
-            'article', 'div.item', 'div.card', 'div.product', 
-            'div.post', 'li', '.listing', '.entry'
-        ]
-        
-        for pattern in common_patterns:
-            elements = soup.select(pattern)
-            if len(elements) >= 3:
-                candidates.insert(0, {
-                    'selector': pattern,
-                    'count': len(elements),
-                    'sample': str(elements[0])[:200]
-                })
-        
-        return candidates[:5]  # Return top 5
-        
+        return _detect_containers(url)
     except Exception as e:
-        return []
+        return [], None
+
+# Helper function for CSV downloads
+def to_csv_bytes(df):
+    """Encode a DataFrame as UTF-8 CSV bytes in a single pass."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, encoding='utf-8', lineterminator='\n')
+    return buffer.getvalue()
 
 # Title
 st.title("🕷️ Web Scraper Pro")
@@ -119,10 +187,10 @@ if mode == "📚 Pre-built Scrapers":
                 data = scraper.scrape_books(num_pages=num_pages)
                 filename = "books_data.csv"
             
-            if data:
-                df = pd.DataFrame(data)
-                
-                st.success(f"✅ Successfully scraped {len(data)} items!")
+            df = pd.DataFrame(data, copy=False)
+            
+            if not df.empty:
+                st.success(f"✅ Successfully scraped {len(df)} items!")
                 
                 # Statistics
                 st.markdown("### 📊 Statistics")
@@ -141,7 +209,7 @@ if mode == "📚 Pre-built Scrapers":
                     if scraper_type == "Books":
                         st.metric("Most Expensive", f"£{df['price'].max():.2f}")
                     else:
-                        st.metric("Total Tags", df['tags'].str.split(',').explode().nunique())
+                        st.metric("Total Tags", len({t.strip() for row in df['tags'] for t in row.split(',') if t.strip()}))
                 
                 st.markdown("### 📋 Scraped Data")
                 st.dataframe(df, use_container_width=True)
@@ -151,7 +219,7 @@ if mode == "📚 Pre-built Scrapers":
                     rating_counts = df['rating'].value_counts()
                     st.bar_chart(rating_counts)
                 
-                csv = df.to_csv(index=False).encode('utf-8')
+                csv = to_csv_bytes(df)
                 st.download_button(
                     label="📥 Download CSV",
                     data=csv,
@@ -187,12 +255,17 @@ else:
         st.session_state.detected_containers = []
     if 'selected_container' not in st.session_state:
         st.session_state.selected_container = None
+    if 'analysed_page' not in st.session_state:
+        st.session_state.analysed_page = (None, None)  # (url, html)
     
     # Auto-detect button
     if url:
         if st.button("🔍 Auto-Detect Data", type="primary"):
             with st.spinner("🤖 Analyzing webpage..."):
-                candidates = auto_detect_containers(url)
+                candidates, html = auto_detect_containers(url)
+                
+                # Keep only the latest page so Step 3 doesn't download it again
+                st.session_state.analysed_page = (url, html)
                 
                 if candidates:
                     st.session_state.detected_containers = candidates
@@ -227,9 +300,10 @@ else:
         if st.button("🚀 Scrape Data Now", type="primary"):
             with st.spinner("Extracting data..."):
                 try:
-                    response = requests.get(url, timeout=15)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                    analysed_url, html = st.session_state.analysed_page
+                    if analysed_url != url or html is None:
+                        html = _fetch_html(url)
+                    soup = BeautifulSoup(html, 'lxml')
                     
                     containers = soup.select(container_selector)[:max_items]
                     
@@ -240,13 +314,12 @@ else:
                         data = []
                         
                         for idx, container in enumerate(containers):
-                            # Get all text elements
-                            text_elements = container.find_all(string=True, recursive=True)
-                            text_elements = [t.strip() for t in text_elements if t.strip()]
+                            # Get the first non-empty text elements (stops walking after 10)
+                            text_elements = islice(container.stripped_strings, 10)  # Max 10 fields
                             
                             # Create item with numbered fields
                             item = {}
-                            for i, text in enumerate(text_elements[:10]):  # Max 10 fields
+                            for i, text in enumerate(text_elements):
                                 if len(text) > 2:  # Ignore very short text
                                     item[f'field_{i+1}'] = text
                             
@@ -266,7 +339,7 @@ else:
                             st.dataframe(df, use_container_width=True)
                             
                             # Download
-                            csv = df.to_csv(index=False).encode('utf-8')
+                            csv = to_csv_bytes(df)
                             st.download_button(
                                 label="📥 Download CSV",
                                 data=csv,
@@ -3,12 +3,21 @@ Web Scraper - A professional scraping tool
 Author: Abbas Hussain Muzammil
 """
 
+import asyncio
 import requests
 from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import pandas as pd
 import logging
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, List, Dict, Optional, Union
+
+try:
+    import aiohttp
+except ImportError:  # Book pages are fetched with threads instead
+    aiohttp = None
 
 
 #Setup logging
@@ -19,6 +28,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Scraped data is kept column by column: {'title': [...], 'price': [...]}
+Columns = Dict[str, List]
+
+BOOKS_URL = "http://books.toscrape.com/catalogue/page-{}.html"
+
+# Most requests we keep open against one site at a time
+MAX_CONNECTIONS_PER_HOST = 5
+
 class WebScraper:
     """
     A professional web scraper with error handling and logging.
@@ -41,55 +58,78 @@ class WebScraper:
             'User-Agent': 'Mozilla/5.0 (Educational Web Scraper)'
         })
         
+        # Compile the book XPath queries once and reuse them on every page.
+        # Field queries run relative to one book; plain strings (not lxml
+        # "smart" strings) keep the results from pinning the parsed page.
+        self._books_xp = {
+            'book': etree.XPath('//article[@class="product_pod"]'),
+            'title': etree.XPath('h3/a/@title', smart_strings=False),
+            'price': etree.XPath('.//p[@class="price_color"]/text()', smart_strings=False),
+            # Rating is the second class, e.g. "star-rating Three"
+            'rating': etree.XPath('p[contains(@class, "star-rating")]/@class', smart_strings=False),
+            'availability': etree.XPath('.//p[contains(@class, "instock")]'),
+        }
+        
         logger.info(f"Scraper initialized for {base_url}")
 
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def _fetch(self, url: str, read: Callable[[requests.Response], Any]) -> Any:
         """
-        Fetch and parse a web page.
+        Request a web page and read its body, without the politeness delay.
         
         Args:
             url: The URL to fetch
+            read: Turns the response into the result
             
         Returns:
-            BeautifulSoup object if successful, None if failed
+            Whatever read() returns if successful, None if failed
         """
         try:
             logger.info(f"Fetching: {url}")
             
-            # Wait to be polite to the server
-            time.sleep(self.delay)
-            
-            # Make the request
+            # Make the request (the whole body is downloaded here)
             response = self.session.get(url, timeout=15)
             
             # Raise error if status code is bad (404, 500, etc.)
             response.raise_for_status()
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'lxml')
+            result = read(response)
             
             logger.info(f"Successfully fetched {url}")
-            return soup
+            return result
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
-            return None 
+            return None
+
+    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Fetch and parse a web page.
+        
+        Args:
+            url: The URL to fetch
+            
+        Returns:
+            BeautifulSoup object if successful, None if failed
+        """
+        # Wait to be polite to the server
+        time.sleep(self.delay)
+        
+        # Parse the HTML
+        return self._fetch(url, lambda response: BeautifulSoup(response.content, 'lxml'))
 
-    def scrape_quotes(self) -> List[Dict]:
+    def scrape_quotes(self) -> Columns:
         """
         Scrape quotes from quotes.toscrape.com
         
         Returns:
-            List of dictionaries with quote data
+            Dictionary of quote data, one list per column
         """
         url = "http://quotes.toscrape.com/"
+        quotes_data = {'quote': [], 'author': [], 'tags': []}
         soup = self.fetch_page(url)
         
         if not soup:
             logger.warning("Failed to fetch page")
-            return []
-        
-        quotes_data = []
+            return quotes_data
         
         # Find all quote elements
         quotes = soup.find_all('div', class_='quote')
@@ -105,93 +145,215 @@ class WebScraper:
                 # Extract tags
                 tags = [tag.get_text(strip=True) for tag in quote.find_all('a', class_='tag')]
                 
-                quotes_data.append({
-                    'quote': text,
-                    'author': author,
-                    'tags': ', '.join(tags)
-                })
+                quotes_data['quote'].append(text)
+                quotes_data['author'].append(author)
+                quotes_data['tags'].append(', '.join(tags))
                 
             except AttributeError as e:
                 logger.warning(f"Error parsing quote: {e}")
                 continue
         
-        logger.info(f"Scraped {len(quotes_data)} quotes")
+        logger.info(f"Scraped {len(quotes_data['quote'])} quotes")
         return quotes_data
-    def scrape_books(self, num_pages: int = 3) -> List[Dict]:
+
+    async def _fetch_async(self, session: 'aiohttp.ClientSession', url: str) -> Optional[bytes]:
         """
-        Scrape books from multiple pages.
+        Fetch the raw body of a web page without blocking the event loop.
         
         Args:
-            num_pages: Number of pages to scrape
+            session: The shared aiohttp session
+            url: The URL to fetch
             
         Returns:
-            List of book data
+            Response body if successful, None if failed
+        """
+        try:
+            logger.info(f"Fetching: {url}")
+            
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                response.raise_for_status()
+                content = await response.read()
+            
+            logger.info(f"Successfully fetched {url}")
+            return content
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    def _parse_books(self, content: bytes, page: int, books_data: Columns) -> None:
+        """
+        Parse the books listed on a single catalogue page.
+        
+        Each field is read with a precompiled XPath query on the book's node.
+        
+        Args:
+            content: Raw HTML of the page
+            page: Page number the HTML came from
+            books_data: Book columns to append the parsed books to
         """
-        books_data = []
-        base_url = "http://books.toscrape.com/catalogue/page-{}.html"
+        try:
+            tree = lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding='utf-8'))
+        except etree.ParserError as e:
+            logger.warning(f"Error parsing page {page}: {e}")
+            return
+        
+        books = self._books_xp['book'](tree)
+        fields = ('title', 'price', 'rating', 'availability')
         
-        for page in range(1, num_pages + 1):
-            url = base_url.format(page)
-            soup = self.fetch_page(url)
+        for book in books:
+            found = {field: self._books_xp[field](book) for field in fields}
             
-            if not soup:
+            # Skip just this book if any of its fields are missing
+            missing = [field for field in fields if not found[field]]
+            if missing:
+                logger.warning(f"Error parsing book on page {page}: missing {', '.join(missing)}")
+                continue
+            
+            try:
+                rating_word = found['rating'][0].split()[1]
+                
+            except IndexError as e:
+                logger.warning(f"Error parsing book: {e}")
+                continue
+            
+            # Prices stay raw ("£51.77") until every page is in
+            books_data['title'].append(found['title'][0])
+            books_data['price'].append(found['price'][0])
+            books_data['rating'].append(rating_word)
+            books_data['availability'].append(str(found['availability'][0].text_content()).strip())
+            books_data['page'].append(page)
+        
+        logger.info(f"Scraped page {page}: {len(books)} books found")
+
+    def _fetch_content(self, url: str) -> Optional[bytes]:
+        """
+        Fetch the raw body of a web page, without the politeness delay.
+        
+        Args:
+            url: The URL to fetch
+            
+        Returns:
+            Response body if successful, None if failed
+        """
+        return self._fetch(url, lambda response: response.content)
+
+    def _collect_books(self, pages: List[Optional[bytes]]) -> Columns:
+        """
+        Parse downloaded catalogue pages into book columns.
+        
+        Args:
+            pages: Raw HTML of each page in order, None where the fetch failed
+            
+        Returns:
+            Dictionary of book data, one list per column
+        """
+        books_data = {'title': [], 'price': [], 'rating': [], 'availability': [], 'page': []}
+        for page, content in enumerate(pages, start=1):
+            if content is None:
                 logger.warning(f"Failed to fetch page {page}")
                 continue
             
-            # Find all book containers
-            books = soup.find_all('article', class_='product_pod')
-            
-            for book in books:
-                try:
-                    # Extract title
-                    title = book.find('h3').find('a')['title']
-                    
-                    # Extract price
-                    price = book.find('p', class_='price_color').get_text(strip=True)
-                    price_clean = float(price.replace('£', ''))
-                    
-                    # Extract rating (One, Two, Three, Four, Five)
-                    rating = book.find('p', class_='star-rating')['class'][1]
-                    
-                    # Extract availability
-                    availability = book.find('p', class_='instock availability').get_text(strip=True)
-                    
-                    books_data.append({
-                        'title': title,
-                        'price': price_clean,
-                        'rating': rating,
-                        'availability': availability,
-                        'page': page
-                    })
-                    
-                except (AttributeError, ValueError, KeyError) as e:
-                    logger.warning(f"Error parsing book: {e}")
-                    continue
-            
-            logger.info(f"Scraped page {page}: {len(books)} books found")
-        
-        logger.info(f"Total books scraped: {len(books_data)}")
+            self._parse_books(content, page, books_data)
+        
+        # Convert all prices in one go; unparseable ones become NaN
+        prices = pd.Series(books_data['price'], dtype=str).str.replace('£', '', regex=False)
+        books_data['price'] = pd.to_numeric(prices, errors='coerce').astype(float).tolist()
+        
+        return books_data
+
+    async def _scrape_books_async(self, num_pages: int) -> Columns:
+        """
+        Download all catalogue pages concurrently, then parse them.
+        
+        Args:
+            num_pages: Number of pages to scrape
+            
+        Returns:
+            Dictionary of book data, one list per column
+        """
+        urls = [BOOKS_URL.format(page) for page in range(1, num_pages + 1)]
+        
+        # Wait once for the whole batch and cap connections per host,
+        # so we stay polite without serialising every request
+        await asyncio.sleep(self.delay)
+        connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS_PER_HOST)
+        
+        async with aiohttp.ClientSession(headers=dict(self.session.headers), connector=connector) as session:
+            pages = await asyncio.gather(*[self._fetch_async(session, url) for url in urls])
+        
+        # Parse off the event loop thread
+        return await asyncio.to_thread(self._collect_books, pages)
+
+    def _scrape_books_threaded(self, num_pages: int) -> Columns:
+        """
+        Download all catalogue pages on a thread pool, then parse them.
+        
+        Args:
+            num_pages: Number of pages to scrape
+            
+        Returns:
+            Dictionary of book data, one list per column
+        """
+        urls = [BOOKS_URL.format(page) for page in range(1, num_pages + 1)]
+        
+        # Same politeness as the async path: one wait, capped workers
+        time.sleep(self.delay)
+        workers = max(1, min(num_pages, MAX_CONNECTIONS_PER_HOST))
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages = list(executor.map(self._fetch_content, urls))
+        
+        return self._collect_books(pages)
+
+    def scrape_books(self, num_pages: int = 3) -> Columns:
+        """
+        Scrape books from multiple pages.
+        
+        Pages are downloaded concurrently rather than one after another,
+        with aiohttp when it is installed and a thread pool otherwise.
+        
+        Args:
+            num_pages: Number of pages to scrape
+            
+        Returns:
+            Dictionary of book data, one list per column
+        """
+        try:
+            # asyncio.run() can't be used inside a running loop (e.g. Jupyter)
+            asyncio.get_running_loop()
+            in_event_loop = True
+        except RuntimeError:
+            in_event_loop = False
+        
+        if aiohttp is None or in_event_loop:
+            books_data = self._scrape_books_threaded(num_pages)
+        else:
+            books_data = asyncio.run(self._scrape_books_async(num_pages))
+        
+        logger.info(f"Total books scraped: {len(books_data['title'])}")
         return books_data
 
-    def save_to_csv(self, data: List[Dict], filename: str) -> None:
+    def save_to_csv(self, data: Union[Columns, List[Dict]], filename: Union[str, IO[bytes]]) -> None:
         """
         Save scraped data to CSV file.
         
         Args:
-            data: List of dictionaries to save
-            filename: Name of the output file
+            data: Column dictionary (or list of row dictionaries) to save
+            filename: Name of the output file, or a binary buffer to write into
         """
-        if not data:
+        if not data or (isinstance(data, dict) and not any(data.values())):
             logger.warning("No data to save")
             return
         
         try:
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(data, copy=False)
             df.to_csv(filename, index=False, encoding='utf-8')
-            logger.info(f"✓ Saved {len(df)} records to {filename}")
+            target = filename if isinstance(filename, str) else "buffer"
+            logger.info(f"✓ Saved {len(df)} records to {target}")
             
             # Show a preview
-            print(f"\nPreview of {filename}:")
+            print(f"\nPreview of {target}:")
             print(df.head())
             
         except Exception as e:
@@ -212,9 +374,9 @@ def main():
     scraper = WebScraper("http://quotes.toscrape.com", delay=1.0)
     quotes = scraper.scrape_quotes()
     
-    if quotes:
+    if quotes['quote']:
         scraper.save_to_csv(quotes, 'quotes_output.csv')
-        print(f"✅ Scraped {len(quotes)} quotes")
+        print(f"✅ Scraped {len(quotes['quote'])} quotes")
     
     # Example 2: Scrape Books (Multiple Pages)
     print("\n📖 Example 2: Scraping Books (3 pages)...")
@@ -222,13 +384,13 @@ def main():
     scraper = WebScraper("http://books.toscrape.com", delay=1.0)
     books = scraper.scrape_books(num_pages=3)
     
-    if books:
+    if books['title']:
         scraper.save_to_csv(books, 'books_output.csv')
-        print(f"✅ Scraped {len(books)} books")
+        print(f"✅ Scraped {len(books['title'])} books")
         
         # Show some analysis
         import pandas as pd
-        df = pd.DataFrame(books)
+        df = pd.DataFrame(books, copy=False)
         print(f"\n📊 Quick Analysis:")
         print(f"   Average price: £{df['price'].mean():.2f}")
         print(f"   Most expensive: £{df['price'].max():.2f}")
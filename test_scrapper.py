@@ -3,11 +3,28 @@ Test Suite for Web Scraper
 Demonstrates testing best practices
 
 """
+import io
+import math
+import threading
 import unittest
-from unittest.mock import Mock, patch
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import AsyncMock, Mock, patch
 from scraper import WebScraper
 from bs4 import BeautifulSoup
 import pandas as pd
+import requests
+
+# A catalogue page with a single book on it
+BOOK_PAGE = b"""
+<html><body>
+<article class="product_pod">
+    <h3><a title="Test Book">Test...</a></h3>
+    <p class="star-rating Three"></p>
+    <p class="price_color">\xc2\xa351.77</p>
+    <p class="instock availability">In stock</p>
+</article>
+</body></html>
+"""
 
 class TestWebScraper(unittest.TestCase):
     """ Test cases for WebScraper class."""
@@ -47,6 +64,17 @@ class TestWebScraper(unittest.TestCase):
         self.assertEqual(soup.find('h1').text, 'Test Page')
         print("✓ Test 3 passed: Fetch page works with mock")
     
+    @patch('scraper.requests.Session.get')
+    def test_fetch_page_dropped_connection(self, mock_get):
+        """Test that a connection dropped mid-body is handled gracefully."""
+        mock_get.side_effect = requests.exceptions.ChunkedEncodingError("Connection broken")
+        
+        soup = self.scraper.fetch_page("http://example.com")
+        
+        # Should return None on error
+        self.assertIsNone(soup)
+        print("✓ Test 9 passed: Handles dropped connections gracefully")
+    
     def test_fetch_page_failure(self):
         """Test that fetch_page handles errors gracefully."""
         # Test with an invalid URL (will fail naturally)
@@ -56,6 +84,66 @@ class TestWebScraper(unittest.TestCase):
         self.assertIsNone(soup)
         print("✓ Test 4 passed: Handles errors gracefully")
     
+    @patch('scraper.WebScraper._fetch_async', new_callable=AsyncMock)
+    def test_scrape_books_concurrent(self, mock_fetch):
+        """Test that every page is fetched and parsed."""
+        mock_fetch.return_value = BOOK_PAGE
+        
+        books = self.scraper.scrape_books(num_pages=3)
+        
+        self.assertEqual(mock_fetch.await_count, 3)
+        self.assertEqual(len(books['title']), 3)
+        self.assertEqual(books['title'][0], 'Test Book')
+        self.assertEqual(books['price'][0], 51.77)
+        self.assertEqual(books['rating'][0], 'Three')
+        self.assertEqual(books['page'], [1, 2, 3])
+        print("✓ Test 7 passed: Books pages fetched concurrently")
+    
+    def test_parse_books_skips_incomplete_book(self):
+        """Test that a book missing a field doesn't drop the rest of the page."""
+        page = BOOK_PAGE.replace(b'</body>', b"""
+        <article class="product_pod">
+            <h3><a title="No Price">No...</a></h3>
+            <p class="star-rating One"></p>
+            <p class="instock availability">In stock</p>
+        </article>
+        </body>""")
+        books = {'title': [], 'price': [], 'rating': [], 'availability': [], 'page': []}
+        
+        self.scraper._parse_books(page, 1, books)
+        
+        self.assertEqual(books['title'], ['Test Book'])
+        # Plain strings, so the parsed page can be freed
+        self.assertIs(type(books['title'][0]), str)
+        self.assertIs(type(books['price'][0]), str)
+        print("✓ Test 10 passed: Incomplete books are skipped")
+    
+    def test_collect_books_bad_price(self):
+        """Test that an unreadable price becomes NaN instead of dropping the book."""
+        bad_page = BOOK_PAGE.replace(b'\xc2\xa351.77', b'Sold out')
+        
+        books = self.scraper._collect_books([bad_page, BOOK_PAGE])
+        
+        self.assertEqual(books['page'], [1, 2])
+        self.assertIsInstance(books['price'], list)
+        self.assertTrue(math.isnan(books['price'][0]))
+        self.assertEqual(books['price'][1], 51.77)
+        print("✓ Test 11 passed: Bad prices become NaN")
+    
+    @patch('scraper.aiohttp', None)
+    @patch('scraper.WebScraper._fetch_content')
+    def test_scrape_books_threaded_fallback(self, mock_fetch):
+        """Test that books are fetched with threads when aiohttp is missing."""
+        # Keyed on the URL, since the pool threads may call in any order
+        mock_fetch.side_effect = lambda url: BOOK_PAGE if 'page-1' in url else None
+        
+        books = self.scraper.scrape_books(num_pages=2)
+        
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(books['title'], ['Test Book'])
+        self.assertEqual(books['page'], [1])
+        print("✓ Test 8 passed: Books fall back to a thread pool")
+    
     def test_save_to_csv_with_data(self):
         """Test saving data to CSV."""
         test_data = [
@@ -63,20 +151,15 @@ class TestWebScraper(unittest.TestCase):
             {'name': 'Item 2', 'price': 20.99}
         ]
         
-        filename = 'test_output.csv'
-        self.scraper.save_to_csv(test_data, filename)
-        
-        # Verify file was created
-        import os
-        self.assertTrue(os.path.exists(filename))
+        # Write to memory instead of disk
+        buffer = io.BytesIO()
+        self.scraper.save_to_csv(test_data, buffer)
         
         # Verify content
-        df = pd.read_csv(filename)
+        buffer.seek(0)
+        df = pd.read_csv(buffer)
         self.assertEqual(len(df), 2)
         self.assertEqual(df['name'].iloc[0], 'Item 1')
-        
-        # Cleanup
-        os.remove(filename)
         print("✓ Test 5 passed: CSV export works")
     
     def test_save_to_csv_empty_data(self):
@@ -92,6 +175,52 @@ class TestWebScraper(unittest.TestCase):
         #Mock() - Creates fake objects to simulate testing
         #mock.get.side_effect - simulates errors
 
+class TestApp(unittest.TestCase):
+    """Test cases for helpers in the Streamlit app."""
+    
+    def test_shared_session_keeps_no_cookies(self):
+        """Test that cookies set by a site aren't kept on the shared session."""
+        import app
+        
+        class CookieHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Set-Cookie', 'visitor=alice; Path=/')
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(('127.0.0.1', 0), CookieHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        
+        session = app.get_session()
+        response = session.get(f"http://127.0.0.1:{server.server_port}/", timeout=5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(session.cookies), 0)
+        print("✓ Test 13 passed: Shared session keeps no cookies")
+    
+    def test_detect_escapes_special_class_names(self):
+        """Test that classes with colons or slashes give usable selectors."""
+        import app
+        
+        item = b'<div class="md:flex w-1/2"><h2>Title</h2><p>Text</p><span>More</span></div>'
+        html = b'<html><body>' + item * 5 + b'</body></html>'
+        
+        with patch('app._fetch_html', return_value=html):
+            candidates, _ = app.auto_detect_containers("http://example.com/tailwind")
+        
+        # Every selector must work in soup.select(), as Step 3 uses it
+        soup = BeautifulSoup(html, 'lxml')
+        selectors = [candidate['selector'] for candidate in candidates]
+        self.assertIn('.md\\:flex', selectors)
+        for selector in selectors:
+            self.assertEqual(len(soup.select(selector)), 5)
+        print("✓ Test 12 passed: Special class names are escaped")
+
 def run_tests():
     """Run all tests with nice output."""
     print("\n" + "=" * 70)
@@ -101,6 +230,7 @@ def run_tests():
     # Create test suite
     loader = unittest.TestLoader()
     suite = loader.loadTestsFromTestCase(TestWebScraper)
+    suite.addTests(loader.loadTestsFromTestCase(TestApp))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)